@@ -36,6 +36,11 @@ fi
 if [[ -n $DEBUG ]]; then
     # Suppress warnings so we only get them once
     "$(find_cxx_compiler)" -o run -g -w $SANITIZER_FLAGS $COMMON_FLAGS "$1"
+elif [[ $PROFILE == perf ]]; then
+    # Frame pointers let perf record call stacks
+    "$(find_cxx_compiler)" -o run -O2 -g -w -fno-omit-frame-pointer $COMMON_FLAGS "$1"
+elif [[ $PROFILE == gprof ]]; then
+    "$(find_cxx_compiler)" -o run -O2 -g -w -pg $COMMON_FLAGS "$1"
 else
     "$(find_cxx_compiler)" -o run -O2 $WARNING_FLAGS $COMMON_FLAGS "$1"
 fi
@@ -7,24 +7,26 @@ VALIDATOR="$2"
 IN_FILE="$3"
 TEMP_DIR="$4"
 
+source "$(dirname "${BASH_SOURCE[0]}")/testcase-io.sh"
+
 rm -rf "$TEMP_DIR"
 mkdir -p "$TEMP_DIR"
 
-if ! "$SOLUTION" < "$IN_FILE" > "$TEMP_DIR/output"; then
+if ! run_with_input "$IN_FILE" "$SOLUTION" > "$TEMP_DIR/output"; then
     # Solution crashed
-    echo "Solution crashed on $(basename "$IN_FILE")" >&2
+    echo "Solution crashed on $(testcase_name "$IN_FILE").in" >&2
     exit 1
 fi
 
-"$VALIDATOR" "$IN_FILE" "${IN_FILE%.in}.ans" "$TEMP_DIR" < "$TEMP_DIR/output"
+run_validator "$VALIDATOR" "$IN_FILE" "$TEMP_DIR" < "$TEMP_DIR/output"
 RESULT="$?"
 
 if [[ $RESULT -eq 43 ]]; then
-    echo "Mismatch on $(basename "$IN_FILE")"
+    echo "Mismatch on $(testcase_name "$IN_FILE").in"
     cat "$TEMP_DIR/judgemessage.txt"
     exit 0
 elif [[ $RESULT -ne 42 ]]; then
-    echo "Solution or validator crashed on $(basename "$IN_FILE")" >&2
+    echo "Solution or validator crashed on $(testcase_name "$IN_FILE").in" >&2
     cat "$TEMP_DIR/judgemessage.txt" >&2
     exit 1
 fi
@@ -1,6 +1,10 @@
 #!/usr/bin/env bash
-# Usage: ./check-tle.sh solution_executable validator_executable in_file temp_dir timelimit
-# Exit code is 2 if a slow solution was found
+# Usage: ./check-tle.sh solution_executable validator_executable in_file temp_dir timelimit [slot]
+# Exit code is 2 if a slow solution was found, or 1 if the testcase could not
+# be read (e.g. decompressing it failed)
+# If PIN_CPUS is set, the solution is pinned to the CPU for the given job slot
+# (see cpu-pinning.sh). If TIMINGS_FILE is set, the measurement is appended to
+# it as `testcase time cpu freq_mhz runnable noisy`.
 
 TIMEFORMAT=%R
 
@@ -8,6 +12,10 @@ SOLUTION="$1"
 IN_FILE="$3"
 TEMP_DIR="$4"
 TIMELIMIT="$5"
+SLOT="${6:-1}"
+
+source "$(dirname "${BASH_SOURCE[0]}")/testcase-io.sh"
+source "$(dirname "${BASH_SOURCE[0]}")/cpu-pinning.sh"
 
 # Read timefactor file
 REPO_ROOT="$(git rev-parse --show-toplevel)"
@@ -31,10 +39,20 @@ fi
 CHECKED_TIMELIMIT="$(bc -l <<< "$TIMELIMIT * $TIMEFACTOR * 1.5")"
 TIMEOUT="$(bc -l <<< "$CHECKED_TIMELIMIT * 2")"
 
-# Use `time timeout ...` instead of `timeout time ...` s.t. bash's time gets
-# used
-TIME="$( (time timeout "$TIMEOUT" "$SOLUTION" < "$IN_FILE" > /dev/null) 2>&1 )"
-RESULT="$?"
+# measure_run uses `time timeout ...` instead of `timeout time ...` s.t.
+# bash's time gets used
+CPU="$(timing_cpu "$SLOT")"
+# A solution crashing is not an error here (see below), but failing to read
+# the testcase is. The reason was already printed by measure_run.
+if ! measure_run "$CPU" "$IN_FILE" timeout "$TIMEOUT" "$SOLUTION"; then
+    exit 1
+fi
+TIME="$MEASURED_TIME"
+RESULT="$MEASURED_RESULT"
+
+if [[ -n $TIMINGS_FILE ]]; then
+    echo "$(testcase_name "$IN_FILE") $TIME $MEASURED_STATE $MEASURED_NOISY" >> "$TIMINGS_FILE"
+fi
 
 # Timeout uses 124 to report timeouts
 if [[ $RESULT -eq 124  ]]; then
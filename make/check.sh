@@ -2,6 +2,8 @@
 # Usage: ./check.sh solution_executable solution_debug_executable solution_name validator_dir testcases_dir timelimit
 
 SCRIPT_DIR="$(dirname "${BASH_SOURCE[0]}")"
+source "$SCRIPT_DIR/testcase-io.sh"
+source "$SCRIPT_DIR/cpu-pinning.sh"
 
 EXECUTABLE="$1"
 DEBUG_EXECUTABLE="$2"
@@ -27,6 +29,18 @@ STDERR_FILE="$TEMP_DIR/stderr"
 rm -f "$STDOUT_FILE" "$STDERR_FILE"
 touch "$STDOUT_FILE" "$STDERR_FILE"
 
+# Timing-sensitive checks record every measurement, and with PIN_CPUS set
+# only run one job per dedicated CPU. Correctness checks use every core.
+JOBS='100%'
+if [[ $TYPE == 'tle' ]]; then
+    export TIMINGS_FILE="$TEMP_DIR/timings"
+    rm -f "$TIMINGS_FILE"
+    setup_pinning || exit 1
+    if [[ -n $PIN_CPUS ]]; then
+        JOBS="$(wc -w <<< "$TIMING_CPUS")"
+    fi
+fi
+
 HAS_PARALLEL=1
 if [[ ! -x $(command -v parallel) ]]; then
     echo "Install GNU parallel for faster checking of solutions"
@@ -35,27 +49,25 @@ fi
 
 check_executable() {
     if [[ $HAS_PARALLEL -eq 1 ]]; then
-        find "$TESTCASES_DIR" \
-             -maxdepth 1 \
-             -type f \
-             -name '*.in' \
+        list_testcases "$TESTCASES_DIR" \
         | parallel --halt now,fail=1 \
+                   --jobs "$JOBS" \
                    "$SCRIPT_DIR/check-$TYPE.sh" \
                    "$1" \
                    "$VALIDATOR" \
                    '{}' \
                    "$TEMP_DIR/feedback-{%}" \
-                   "$TIMELIMIT >> '$STDOUT_FILE' 2>> '$STDERR_FILE'" \
+                   "$TIMELIMIT {%} >> '$STDOUT_FILE' 2>> '$STDERR_FILE'" \
                    2> /dev/null  # Silences the 'this job failed' message
         EARLY_EXIT_CODE="$?"
     else
-        for f in "$TESTCASES_DIR"/*.in; do
+        while read -r f; do
             "$SCRIPT_DIR/check-$TYPE.sh" "$1" "$VALIDATOR" "$f" "$TEMP_DIR/feedback" "$TIMELIMIT" >> "$STDOUT_FILE" 2>> "$STDERR_FILE"
             EARLY_EXIT_CODE="$?"
             if [[ $EARLY_EXIT_CODE -ne 0 ]]; then
                 break
             fi
-        done
+        done < <(list_testcases "$TESTCASES_DIR")
     fi
 }
 
@@ -69,6 +81,10 @@ if [[ -f $DEBUG_EXECUTABLE ]] && [[ $TYPE == 'ac' ]] && [[ $EARLY_EXIT_CODE -eq
     check_executable "$DEBUG_EXECUTABLE"
 fi
 
+if [[ -s $TIMINGS_FILE ]] && grep -q ' 1$' "$TIMINGS_FILE"; then
+    echo "  Some measurements were noisy even after rerunning them, see $TIMINGS_FILE"
+fi
+
 # The check-* scripts use exit code 1 to report a validator or AC solution
 # crashing
 if [[ $EARLY_EXIT_CODE -eq 1 ]]; then
@@ -0,0 +1,73 @@
+#!/usr/bin/env bash
+# Usage: ./compress-testcases.sh testcases_dir answer_generator_executable
+# Moves all non-sample testcases into the compressed store: every `.in` and
+# `.ans` file is replaced by a zstd frame (`.in.zst`/`.ans.zst`). Answers of
+# testcases that were already compressed are regenerated by streaming the
+# input through the answer generator, without decompressing it to disk.
+# Samples are kept uncompressed since the problem statement includes them.
+# Finally, `manifest` lists every compressed testcase with its uncompressed
+# input and answer sizes in bytes.
+
+set -e -o pipefail
+shopt -s nullglob
+
+TESTCASES_DIR="$1"
+ANSWER_GENERATOR="$2"
+
+source "$(dirname "${BASH_SOURCE[0]}")/testcase-io.sh"
+
+if [[ ! -x $(command -v zstd) ]]; then
+    echo 'zstd is required for compressed testcases!' >&2
+    exit 1
+fi
+
+MANIFEST="$TESTCASES_DIR/manifest"
+rm -f "$MANIFEST.tmp"
+touch "$MANIFEST.tmp"
+# Don't leave partial files behind if an answer could not be generated
+trap 'rm -f "$MANIFEST.tmp" "$TESTCASES_DIR"/*.ans.zst.tmp "$TESTCASES_DIR"/*.ans.zst.count' EXIT
+
+# Usage: input_size in_file
+# Inputs do not change while they are compressed, so their size is taken from
+# the previous manifest instead of decompressing them again
+input_size() {
+    local SIZE
+    if [[ -f $MANIFEST ]]; then
+        SIZE="$(awk -v name="$(testcase_name "$1")" '$1 == name { print $2 }' "$MANIFEST")"
+    fi
+    if [[ -z $SIZE ]]; then
+        SIZE="$(cat_testcase "$1" | wc -c | tr -d ' ')"
+    fi
+    echo "$SIZE"
+}
+
+for f in "$TESTCASES_DIR"/*.in.zst; do
+    ANS_FILE="$(testcase_ans "$f")"
+    # dd counts the answer bytes on their way to zstd, and reports them as
+    # the first word of its last line on stderr
+    run_with_input "$f" "$ANSWER_GENERATOR" \
+        | dd bs=1048576 2> "$ANS_FILE.count" \
+        | zstd -qf -T0 -o "$ANS_FILE.tmp"
+    mv "$ANS_FILE.tmp" "$ANS_FILE"
+    printf '%s %s %s\n' \
+           "$(testcase_name "$f")" \
+           "$(input_size "$f")" \
+           "$(tail -n1 "$ANS_FILE.count" | cut -d' ' -f1)" \
+           >> "$MANIFEST.tmp"
+    rm "$ANS_FILE.count"
+done
+
+for f in "$TESTCASES_DIR"/*.in; do
+    if [[ $(basename "$f") == sample* ]]; then
+        continue
+    fi
+    ANS_FILE="$(testcase_ans "$f")"
+    printf '%s %s %s\n' \
+           "$(testcase_name "$f")" \
+           "$(wc -c < "$f" | tr -d ' ')" \
+           "$(wc -c < "$ANS_FILE" | tr -d ' ')" \
+           >> "$MANIFEST.tmp"
+    zstd -qf -T0 --rm "$f" "$ANS_FILE"
+done
+
+sort "$MANIFEST.tmp" > "$MANIFEST"
@@ -0,0 +1,287 @@
+#!/usr/bin/env bash
+# Helpers for timing-sensitive runs, to be sourced by the other scripts.
+# When PIN_CPUS is set, every timed run is pinned to a dedicated CPU and the
+# number of concurrent runs is limited to the number of such CPUs:
+#  * PIN_CPUS=auto uses the CPUs isolated by the kernel (isolcpus) if there are
+#    any, and one CPU per physical core otherwise, so that SMT siblings stay
+#    idle. If possible, core 0 is left free for the rest of the system.
+#  * PIN_CPUS=<list> uses the given CPUs, e.g. PIN_CPUS=2-5,8
+# Every measurement also samples the frequency of the CPU running the solution
+# and the number of other processes runnable on it while it runs. With
+# PIN_CPUS set, measurements that look noisy are rerun.
+
+# How often a noisy measurement gets repeated at most
+NOISY_RERUNS=2
+# Seconds between two samples of the CPU state
+SAMPLE_INTERVAL=0.1
+
+# Usage: expand_cpu_list list
+# Turns a list such as `0-2,5` into `0 1 2 5`
+expand_cpu_list() {
+    local RANGE
+    for RANGE in ${1//,/ }; do
+        if [[ $RANGE == *-* ]]; then
+            seq "${RANGE%-*}" "${RANGE#*-}"
+        else
+            echo "$RANGE"
+        fi
+    done | tr '\n' ' '
+}
+
+# Usage: timing_cpus
+# Prints the CPUs to use for timing-sensitive runs, separated by spaces
+timing_cpus() {
+    if [[ $PIN_CPUS != auto ]]; then
+        expand_cpu_list "$PIN_CPUS"
+        return
+    fi
+
+    local ISOLATED
+    ISOLATED="$(cat /sys/devices/system/cpu/isolated 2> /dev/null)"
+    if [[ -n $ISOLATED ]]; then
+        expand_cpu_list "$ISOLATED"
+        return
+    fi
+
+    # The first CPU of each core's sibling list represents that core
+    local CORES
+    CORES="$(cat /sys/devices/system/cpu/cpu[0-9]*/topology/thread_siblings_list \
+             | sed 's/[-,].*//' \
+             | sort -nu)"
+    if [[ $(wc -l <<< "$CORES") -gt 1 ]]; then
+        CORES="$(grep -vx 0 <<< "$CORES")"
+    fi
+    echo $CORES
+}
+
+# Usage: setup_pinning
+# Checks PIN_CPUS and exports TIMING_CPUS if it is set. Fails if pinning is
+# not possible, e.g. because a CPU is offline or taskset is missing.
+setup_pinning() {
+    if [[ -z $PIN_CPUS ]]; then
+        return
+    fi
+    if [[ $OSTYPE != "linux"* ]]; then
+        echo 'PIN_CPUS is only supported on linux' >&2
+        return 1
+    fi
+    if [[ ! -x $(command -v taskset) ]]; then
+        echo 'taskset missing!' >&2
+        return 1
+    fi
+    TIMING_CPUS="$(timing_cpus)"
+    if [[ -z $TIMING_CPUS ]]; then
+        echo "No CPUs to pin to for PIN_CPUS=$PIN_CPUS" >&2
+        return 1
+    fi
+    local ONLINE CPU
+    ONLINE=" $(expand_cpu_list "$(cat /sys/devices/system/cpu/online)")"
+    for CPU in $TIMING_CPUS; do
+        if [[ $ONLINE != *" $CPU "* ]] || ! taskset -c "$CPU" true 2> /dev/null; then
+            echo "Cannot pin to CPU $CPU (PIN_CPUS=$PIN_CPUS), online CPUs are $(cat /sys/devices/system/cpu/online)" >&2
+            return 1
+        fi
+    done
+    export TIMING_CPUS
+}
+
+# Usage: timing_cpu slot
+# Prints the CPU for the given 1-based job slot, or nothing if PIN_CPUS is
+# unset
+timing_cpu() {
+    if [[ -n $PIN_CPUS ]]; then
+        local CPUS
+        read -r -a CPUS <<< "${TIMING_CPUS:-$(timing_cpus)}"
+        echo "${CPUS[$(( ($1 - 1) % ${#CPUS[@]} ))]}"
+    fi
+}
+
+# Usage: pin_to_cpu cpu command [args...]
+# Runs the command on the given CPU, or unpinned if cpu is empty
+pin_to_cpu() {
+    local CPU="$1"
+    shift
+    if [[ -n $CPU ]]; then
+        taskset -c "$CPU" "$@"
+    else
+        "$@"
+    fi
+}
+
+# Usage: sample_cpu_state cpu run_pid [input_pid]
+# While run_pid is running, prints `cpu freq_mhz runnable` every
+# SAMPLE_INTERVAL seconds: the CPU's current frequency and the number of other
+# runnable processes on that CPU. Neither the measured run (run_pid, the
+# decompressing input_pid and all their children) nor the sampler itself are
+# counted. If cpu is empty, the CPU the solution last ran on is sampled.
+# Unavailable values are printed as `-`.
+# The loop does not fork apart from sleep, so that it does not disturb the
+# processes it counts.
+sample_cpu_state() {
+    local -A PARENT STATE PROCESSOR IN_RUN
+    local STAT_FILE STAT PID ANCESTOR CHILD SOLUTION CPU FREQ RUNNABLE
+    while kill -0 "$2" 2> /dev/null; do
+        PARENT=()
+        STATE=()
+        PROCESSOR=()
+        for STAT_FILE in /proc/[0-9]*/stat; do
+            read -r STAT < "$STAT_FILE" 2> /dev/null || continue
+            PID="${STAT%% *}"
+            # Fields 3, 4 and 39 of stat are the state, the parent and the
+            # CPU the process last ran on
+            read -r -a STAT <<< "${STAT##*) }"
+            STATE[$PID]="${STAT[0]}"
+            PARENT[$PID]="${STAT[1]}"
+            PROCESSOR[$PID]="${STAT[36]}"
+        done
+
+        # Mark every process descending from the run or the decompression
+        IN_RUN=([$2]=1)
+        if [[ -n $3 ]]; then
+            IN_RUN[$3]=1
+        fi
+        for PID in "${!PARENT[@]}"; do
+            ANCESTOR="${PARENT[$PID]}"
+            while [[ -n $ANCESTOR ]] && [[ $ANCESTOR -gt 1 ]] && [[ -z ${IN_RUN[$ANCESTOR]} ]]; do
+                ANCESTOR="${PARENT[$ANCESTOR]}"
+            done
+            if [[ -n $ANCESTOR ]] && [[ -n ${IN_RUN[$ANCESTOR]} ]]; then
+                IN_RUN[$PID]=1
+            fi
+        done
+        # The solution is the youngest process at the bottom of the run, below
+        # wrappers such as timeout or taskset
+        CHILD="$2"
+        while [[ -n $CHILD ]]; do
+            SOLUTION="$CHILD"
+            CHILD=''
+            for PID in "${!PARENT[@]}"; do
+                if [[ ${PARENT[$PID]} == "$SOLUTION" ]] && [[ -z $CHILD || $PID -gt $CHILD ]]; then
+                    CHILD="$PID"
+                fi
+            done
+        done
+
+        CPU="${1:-${PROCESSOR[$SOLUTION]}}"
+        RUNNABLE='-'
+        if [[ -n $CPU ]]; then
+            RUNNABLE=0
+            for PID in "${!STATE[@]}"; do
+                if [[ ${STATE[$PID]} == R ]] && [[ ${PROCESSOR[$PID]} == "$CPU" ]] \
+                   && [[ -z ${IN_RUN[$PID]} ]] && [[ $PID != "$BASHPID" ]]; then
+                    RUNNABLE="$((RUNNABLE + 1))"
+                fi
+            done
+        fi
+        if read -r FREQ < "/sys/devices/system/cpu/cpu$CPU/cpufreq/scaling_cur_freq"; then
+            FREQ="$((FREQ / 1000))"
+        else
+            FREQ='-'
+        fi
+        echo "${CPU:--} $FREQ $RUNNABLE"
+        sleep "$SAMPLE_INTERVAL"
+    done
+}
+
+# Usage: summarize_cpu_state samples_file
+# Prints `cpu freq_mhz runnable` for a run: the last sampled CPU, the average
+# sampled frequency and the average number of other runnable processes, so
+# that a single busy moment does not spoil the run. Everything is `-` if the
+# run was too short to be sampled.
+summarize_cpu_state() {
+    awk '
+        { cpu = $1 }
+        $2 != "-" { freq += $2; freqs++ }
+        $3 != "-" { runnable += $3; runnables++ }
+        END {
+            printf "%s %s %s\n", (NR ? cpu : "-"),
+                   (freqs ? int(freq / freqs) : "-"),
+                   (runnables ? int(runnable / runnables + 0.5) : "-")
+        }' "$1"
+}
+
+# Usage: is_noisy cpu freq_mhz runnable
+# A measurement is noisy if the CPU was clocked below its base frequency (or
+# below 75% of its maximum frequency if the base frequency is unknown), or if
+# other processes were runnable on its CPU most of the time
+is_noisy() {
+    local CPUFREQ_DIR="/sys/devices/system/cpu/cpu$1/cpufreq"
+    local BASE_FREQ
+    if [[ $2 != - ]]; then
+        if [[ -f $CPUFREQ_DIR/base_frequency ]]; then
+            BASE_FREQ="$(( $(cat "$CPUFREQ_DIR/base_frequency") / 1000 ))"
+        elif [[ -f $CPUFREQ_DIR/cpuinfo_max_freq ]]; then
+            BASE_FREQ="$(( $(cat "$CPUFREQ_DIR/cpuinfo_max_freq") * 3 / 4000 ))"
+        fi
+        if [[ -n $BASE_FREQ ]] && [[ $2 -lt $BASE_FREQ ]]; then
+            return 0
+        fi
+    fi
+    [[ $3 != - ]] && [[ $3 -gt 0 ]]
+}
+
+
+# Usage: measure_run cpu in_file command [args...]
+# Times the command on the testcase, pinned to cpu (if not empty), while
+# sampling the CPU state. Only with PIN_CPUS set, noisy measurements are
+# repeated up to NOISY_RERUNS times, keeping the fastest run if all of them are
+# noisy. Runs stopped by GNU timeout (exit code 124) are not repeated, noise
+# does not explain those.
+# Sets MEASURED_TIME, MEASURED_RESULT (the exit code), MEASURED_STATE
+# (`cpu freq_mhz runnable`, see summarize_cpu_state) and MEASURED_NOISY (0 or 1).
+# Returns 1 if the testcase could not be read, e.g. because decompressing it
+# failed.
+measure_run() {
+    local CPU="$1"
+    local IN_FILE="$2"
+    shift 2
+    local TRY TIME RESULT STATE NOISY SAMPLES
+    SAMPLES="$(mktemp)"
+    for (( TRY = 0; TRY <= NOISY_RERUNS; TRY++ )); do
+        # The input is opened outside of the timing, and decompression errors
+        # go to stderr instead of being silenced with the command's output
+        if ! open_input "$IN_FILE"; then
+            rm -f "$SAMPLES"
+            return 1
+        fi
+        TIME="$( (
+            time {
+                pin_to_cpu "$CPU" "$@" <&"$INPUT_FD" > /dev/null 2>&1 &
+                RUN_PID="$!"
+                sample_cpu_state "$CPU" "$RUN_PID" "$INPUT_PID" > "$SAMPLES" 2> /dev/null &
+                wait "$RUN_PID"
+            }
+            RESULT="$?"
+            # $! is the sampler, stop it outside of the timing
+            kill "$!" 2> /dev/null
+            exit "$RESULT"
+        ) 2>&1 )"
+        RESULT="$?"
+        if ! close_input "$IN_FILE"; then
+            rm -f "$SAMPLES"
+            return 1
+        fi
+        STATE="$(summarize_cpu_state "$SAMPLES")"
+        NOISY=0
+        if [[ -n $PIN_CPUS ]] && is_noisy $STATE; then
+            NOISY=1
+        fi
+        if [[ $NOISY -eq 0 ]] || [[ $RESULT -eq 124 ]]; then
+            MEASURED_TIME="$TIME"
+            MEASURED_RESULT="$RESULT"
+            MEASURED_STATE="$STATE"
+            MEASURED_NOISY="$NOISY"
+            rm -f "$SAMPLES"
+            return
+        fi
+        # TIMEFORMAT=%R always prints three decimals, so the times can be
+        # compared as integers
+        if [[ $TRY -eq 0 ]] || (( 10#${TIME/./} < 10#${MEASURED_TIME/./} )); then
+            MEASURED_TIME="$TIME"
+            MEASURED_RESULT="$RESULT"
+            MEASURED_STATE="$STATE"
+        fi
+    done
+    MEASURED_NOISY=1
+    rm -f "$SAMPLES"
+}
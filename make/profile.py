@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Profile a solution on its slowest testcases.
+
+The slowest testcases are taken from the timing data written by time.sh, and
+the solution is rerun on each of them under a profiler:
+ * perf: records call stacks, stored as perf.data and as folded stacks
+   (stacks.folded) that can be passed directly to flamegraph.pl
+ * gprof: the flat profile and call graph are stored as gprof.txt. The call
+   graph only records direct callers, not whole call stacks, so gprof gives a
+   summary only and no flame graph
+ * cProfile (Python solutions): stored as profile.pstats, which can be viewed
+   using snakeviz or turned into a flame graph with flameprof
+A summary of the top functions by self time on each testcase is written to
+summary.txt.
+"""
+import argparse
+import os
+import pstats
+import re
+import shutil
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+PERF_FREQUENCY = 999
+# Lines of stderr shown when a profiled run fails
+STDERR_LINES = 20
+PERF_OFFSET_RE = re.compile(r'\+0x[0-9a-f]+$')
+# Flat profile rows: % time, cumulative seconds, self seconds, then optionally
+# calls, self ms/call and total ms/call, and finally the function name
+GPROF_FLAT_RE = re.compile(r'^\s*(\d+\.\d+)\s+\S+\s+\S+\s+(?:\d+\s+\S+\s+\S+\s+)?(.+)$')
+
+
+def exit_error(message):
+    print(message, file=sys.stderr)
+    sys.exit(1)
+
+
+def slowest_testcases(times_file, count):
+    with open(times_file, 'r') as f:
+        times = [(name, float(time)) for name, time in
+                 (line.split() for line in f if line.strip())]
+    times.sort(key=lambda entry: entry[1], reverse=True)
+    return times[:count]
+
+
+def find_input(testcases_dir, name):
+    for path in (testcases_dir / f'{name}.in', testcases_dir / f'{name}.in.zst'):
+        if path.exists():
+            return path
+    exit_error(f'Testcase {name} not found, rerun `make time-full-*`')
+
+
+def run_checked(command, description, **kwargs):
+    """Run command, exiting with its stderr if it cannot be run or fails."""
+    try:
+        result = subprocess.run(command, stderr=subprocess.PIPE, **kwargs)
+    except OSError as err:
+        exit_error(f'{description} failed: {err}')
+    if result.returncode != 0:
+        stderr = result.stderr
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode(errors='replace')
+        stderr = '\n'.join(stderr.rstrip().splitlines()[-STDERR_LINES:])
+        exit_error(f'{description} failed with exit code {result.returncode}'
+                   + (f':\n{stderr}' if stderr else ''))
+    return result
+
+
+def run_on_input(command, in_file, description, **kwargs):
+    # Compressed testcases are streamed to the solution, see testcase-io.sh
+    if in_file.suffix == '.zst':
+        with subprocess.Popen(['zstd', '-dcq', '--', str(in_file)],
+                              stdout=subprocess.PIPE) as zstd:
+            run_checked(command, description, stdin=zstd.stdout,
+                        stdout=subprocess.DEVNULL, **kwargs)
+            zstd.stdout.close()
+        # zstd gets killed by SIGPIPE if the solution did not read everything
+        if zstd.returncode not in (0, -13):
+            exit_error(f'Decompressing {in_file.name} failed')
+    else:
+        with open(in_file, 'rb') as stdin:
+            run_checked(command, description, stdin=stdin,
+                        stdout=subprocess.DEVNULL, **kwargs)
+
+
+def require_output(path, description):
+    if not path.exists():
+        exit_error(f'{description} did not write {path.name}')
+
+
+def fold_perf_script(script_output):
+    """Turn `perf script` output into folded stacks with sample counts."""
+    stacks = Counter()
+    frames = None
+    for line in script_output.splitlines() + ['']:
+        if not line.strip():
+            if frames:
+                stacks[';'.join(reversed(frames))] += 1
+            frames = None
+        elif not line[0].isspace():
+            # Sample header, the call stack follows with the innermost first
+            frames = []
+        elif frames is not None:
+            _, _, symbol = line.strip().partition(' ')
+            symbol = symbol.rsplit(' (', 1)[0]
+            frames.append(PERF_OFFSET_RE.sub('', symbol) or '[unknown]')
+    return stacks
+
+
+def top_from_stacks(stacks):
+    total = sum(stacks.values())
+    self_samples = Counter()
+    for stack, samples in stacks.items():
+        self_samples[stack.rsplit(';', 1)[-1]] += samples
+    return [(name, samples / total) for name, samples in self_samples.items()]
+
+
+def profile_perf(run, in_file, out_dir):
+    perf_data = out_dir / 'perf.data'
+    # perf record exits with the exit code of the solution, and fails on its
+    # own if recording is not permitted
+    run_on_input(['perf', 'record', '--quiet', '-F', str(PERF_FREQUENCY), '-g',
+                  '-o', str(perf_data), '--', str(run)], in_file,
+                 'Running the solution under perf record (if recording is '
+                 'not permitted, check /proc/sys/kernel/perf_event_paranoid)')
+    require_output(perf_data, 'perf record')
+    script = run_checked(['perf', 'script', '-i', str(perf_data)],
+                         'perf script', stdout=subprocess.PIPE,
+                         text=True).stdout
+    stacks = fold_perf_script(script)
+    with open(out_dir / 'stacks.folded', 'w') as f:
+        for stack, samples in sorted(stacks.items()):
+            f.write(f'{stack} {samples}\n')
+    return top_from_stacks(stacks) if stacks else []
+
+
+def profile_gprof(run, in_file, out_dir):
+    # gmon.out is written to the working directory of the solution, but only
+    # if it exits normally
+    run_on_input([str(run)], in_file, 'Running the solution', cwd=out_dir)
+    require_output(out_dir / 'gmon.out', 'The solution')
+    report = run_checked(['gprof', '-b', str(run), str(out_dir / 'gmon.out')],
+                         'gprof', stdout=subprocess.PIPE, text=True).stdout
+    (out_dir / 'gprof.txt').write_text(report)
+    top = []
+    for line in report.split('Call graph')[0].splitlines():
+        match = GPROF_FLAT_RE.match(line)
+        if match:
+            top.append((match.group(2), float(match.group(1)) / 100))
+    return top
+
+
+def profile_cprofile(run, in_file, out_dir):
+    stats_file = out_dir / 'profile.pstats'
+    env = dict(os.environ, PROFILE_OUTPUT=str(stats_file))
+    run_on_input([str(run)], in_file, 'Running the solution', env=env)
+    require_output(stats_file, 'The solution')
+    stats = pstats.Stats(str(stats_file))
+    total = max(stats.total_tt, 1e-9)
+    return [(f'{func} ({Path(file).name}:{line})', tottime / total)
+            for (file, line, func), (_, _, tottime, _, _) in stats.stats.items()]
+
+
+PROFILERS = {
+    'perf': profile_perf,
+    'gprof': profile_gprof,
+    'cprofile': profile_cprofile,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('run', type=Path,
+                        help='the solution executable built for profiling')
+    parser.add_argument('times_file', type=Path,
+                        help='the runtimes of the solution written by time.sh')
+    parser.add_argument('testcases_dir', type=Path,
+                        help='the directory containing the testcases')
+    parser.add_argument('output_dir', type=Path,
+                        help='the directory to write the profiles to')
+    parser.add_argument('--profiler', choices=PROFILERS.keys(), default='perf',
+                        help='the profiler to use')
+    parser.add_argument('--count', type=int, default=3,
+                        help='the number of slowest testcases to profile')
+    parser.add_argument('--top', type=int, default=10,
+                        help='the number of functions listed in the summary')
+    args = parser.parse_args()
+
+    run = args.run.resolve()
+    profiler = PROFILERS[args.profiler]
+    if args.profiler != 'cprofile' and shutil.which(args.profiler) is None:
+        exit_error(f'{args.profiler} missing!')
+    shutil.rmtree(args.output_dir, ignore_errors=True)
+    args.output_dir.mkdir(parents=True)
+    summary = []
+    for name, time in slowest_testcases(args.times_file, args.count):
+        print(f'  Profiling on {name} ({time}s)')
+        out_dir = args.output_dir / name
+        out_dir.mkdir()
+        top = profiler(run, find_input(args.testcases_dir, name).resolve(),
+                       out_dir.resolve())
+        top.sort(key=lambda entry: entry[1], reverse=True)
+        summary.append(f'{name} ({time}s)')
+        summary.extend(f'  {share * 100:6.2f}%  {function}'
+                       for function, share in top[:args.top])
+        summary.append('')
+
+    (args.output_dir / 'summary.txt').write_text('\n'.join(summary))
+    print('\n'.join(summary), end='')
+    print(f'Profiles written to {args.output_dir}')
+
+
+if __name__ == '__main__':
+    main()
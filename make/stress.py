@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Stress test a solution on small random testcases.
+
+Every iteration runs the stress generator with a fresh seed, generates the
+answer using the reference (the answer generator or primary solution), and
+checks the output of the tested solution with the validator. Iterations are
+spread over long-lived worker threads, each reusing its own scratch directory,
+and stop at the first failing testcase. The smallest failing input found by
+then is saved as a testcase candidate.
+
+With --batch, the generator is started once per batch instead of once per
+testcase: it receives the seed and the batch size as arguments and writes the
+testcases separated by lines containing only BATCH_SEPARATOR. The reference,
+the solution and the validator each read a single testcase, so they are still
+started once per testcase.
+"""
+import argparse
+import itertools
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+EXIT_AC = 42
+EXIT_WA = 43
+# Stress testcases are small, so anything this much slower than the timelimit
+# is most likely stuck
+TIMEOUT_FACTOR = 10
+BATCH_SEPARATOR = b'%'
+
+
+class StressError(Exception):
+    pass
+
+
+class Failure(NamedTuple):
+    name: str
+    input: bytes
+    answer: bytes
+    output: bytes
+    reason: str
+    judgemessage: str = ''
+
+
+def exit_error(message):
+    print(message, file=sys.stderr)
+    sys.exit(1)
+
+
+class Stresser:
+    def __init__(self, args):
+        self.solution = str(args.solution.resolve())
+        self.reference = str(args.reference.resolve())
+        self.generator = str(args.generator.resolve())
+        self.validator = str(args.validator.resolve())
+        self.output_dir = args.output_dir
+        self.timeout = args.timelimit * TIMEOUT_FACTOR
+        self.batch = args.batch
+        self.local = threading.local()
+        self.worker_ids = itertools.count()
+        self.work_dirs = []
+        # Set once a failure is found, so that running batches stop early
+        self.stopped = threading.Event()
+
+    def work_dir(self):
+        # Each worker thread keeps its scratch directory for all iterations
+        if not hasattr(self.local, 'work_dir'):
+            work_dir = self.output_dir / f'work-{next(self.worker_ids)}'
+            shutil.rmtree(work_dir, ignore_errors=True)
+            (work_dir / 'feedback').mkdir(parents=True)
+            self.work_dirs.append(work_dir)
+            self.local.work_dir = work_dir
+        return self.local.work_dir
+
+    def remove_work_dirs(self):
+        for work_dir in self.work_dirs:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def run(self, command, stdin):
+        try:
+            return subprocess.run(command, input=stdin, stdout=subprocess.PIPE,
+                                  stderr=subprocess.DEVNULL,
+                                  timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return None
+        except OSError as err:
+            raise StressError(f'Could not run {command[0]}: {err}')
+
+    def generate(self, seed, count):
+        if self.batch == 1:
+            generated = self.run([self.generator, str(seed)], None)
+        else:
+            generated = self.run([self.generator, str(seed), str(count)], None)
+        if generated is None or generated.returncode != 0:
+            raise StressError(f'Generator failed on seed {seed}')
+        if self.batch == 1:
+            return [(str(seed), generated.stdout)]
+
+        testcases = [[]]
+        for line in generated.stdout.splitlines(keepends=True):
+            if line.rstrip(b'\r\n') == BATCH_SEPARATOR:
+                testcases.append([])
+            else:
+                testcases[-1].append(line)
+        # The separator may also terminate the last testcase
+        if not testcases[-1]:
+            testcases.pop()
+        if len(testcases) != count:
+            raise StressError(f'Generator wrote {len(testcases)} instead of '
+                              f'{count} testcases on seed {seed}')
+        return [(f'{seed}-{index}', b''.join(lines))
+                for index, lines in enumerate(testcases)]
+
+    def iteration(self, seed, count):
+        """Test a batch of count testcases, starting at seed.
+
+        Returns the number of testcases tested and the failure if one was
+        found, stopping at the first failing testcase or once any other
+        iteration found one.
+        """
+        if self.stopped.is_set():
+            return 0, None
+        testcases = self.generate(seed, count)
+        for tested, (name, testcase) in enumerate(testcases):
+            if self.stopped.is_set():
+                return tested, None
+            failure = self.check(name, testcase)
+            if failure is not None:
+                self.stopped.set()
+                return tested + 1, failure
+        return len(testcases), None
+
+    def check(self, name, testcase) -> Optional[Failure]:
+        reference = self.run([self.reference], testcase)
+        if reference is None or reference.returncode != 0:
+            raise StressError(f'Reference failed on seed {name}')
+        answer = reference.stdout
+
+        solution = self.run([self.solution], testcase)
+        if solution is None:
+            return Failure(name, testcase, answer, b'', 'Timeout')
+        if solution.returncode != 0:
+            return Failure(name, testcase, answer, solution.stdout,
+                           f'Crashed with exit code {solution.returncode}')
+
+        work_dir = self.work_dir()
+        judgemessage = work_dir / 'feedback' / 'judgemessage.txt'
+        if judgemessage.exists():
+            judgemessage.unlink()
+        (work_dir / 'testcase.in').write_bytes(testcase)
+        (work_dir / 'testcase.ans').write_bytes(answer)
+        validated = self.run(
+            [self.validator, str(work_dir / 'testcase.in'),
+             str(work_dir / 'testcase.ans'), str(work_dir / 'feedback')],
+            solution.stdout)
+        if validated is None:
+            raise StressError(f'Validator timed out on seed {name}')
+        if validated.returncode == EXIT_AC:
+            return None
+        if validated.returncode == EXIT_WA:
+            message = judgemessage.read_text() if judgemessage.exists() else ''
+            return Failure(name, testcase, answer, solution.stdout,
+                           'Wrong answer', message)
+        raise StressError(f'Validator crashed on seed {name}')
+
+
+def report_progress(iterations, start, final=False):
+    elapsed = max(time.monotonic() - start, 1e-9)
+    message = (f'  {iterations} iterations in {elapsed:.1f}s '
+               f'({iterations / elapsed:.0f} iterations/s)')
+    if final:
+        print(f'\r{message}' if sys.stdout.isatty() else message)
+    elif sys.stdout.isatty():
+        print(f'\r{message}', end='', flush=True)
+
+
+def save_failure(failure, solution_name, output_dir):
+    name = f'stress-{failure.name}'
+    (output_dir / f'{name}.in').write_bytes(failure.input)
+    (output_dir / f'{name}.ans').write_bytes(failure.answer)
+    (output_dir / f'{name}.out').write_bytes(failure.output)
+    (output_dir / f'{name}.desc').write_text(
+        f'Stress test failure of {solution_name} (seed {failure.name})\n')
+    return output_dir / f'{name}.in'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('solution', type=Path,
+                        help='the solution executable to test')
+    parser.add_argument('reference', type=Path,
+                        help='the executable generating the answers')
+    parser.add_argument('generator', type=Path,
+                        help='the stress generator, taking a seed (and the '
+                             'batch size with --batch) as arguments')
+    parser.add_argument('validator', type=Path,
+                        help='the validator executable')
+    parser.add_argument('output_dir', type=Path,
+                        help='the directory to store failing testcases in')
+    parser.add_argument('--timelimit', type=float, default=1.0,
+                        help='the timelimit of the problem in seconds')
+    parser.add_argument('--iterations', type=int,
+                        help='stop after this many iterations (default: '
+                             'run until a failure is found or interrupted)')
+    parser.add_argument('--seed', type=int,
+                        help='the seed of the first iteration, further '
+                             'iterations increment it (default: random)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help='the number of parallel iterations')
+    parser.add_argument('--batch', type=int, default=1,
+                        help='the number of testcases the generator writes '
+                             'per run, see BATCH_SEPARATOR')
+    args = parser.parse_args()
+    if args.batch < 1:
+        exit_error('The batch size must be positive')
+
+    solution_name = args.output_dir.name
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    stresser = Stresser(args)
+    first_seed = args.seed if args.seed is not None else random.randrange(2 ** 62)
+    # Every batch covers the seeds from its first seed on, only the last batch
+    # may be smaller to stop after exactly --iterations testcases
+    batches = ((seed, args.batch)
+               for seed in itertools.count(first_seed, args.batch))
+    if args.iterations is not None:
+        batches = ((seed, min(count, first_seed + args.iterations - seed))
+                   for seed, count in itertools.islice(
+                       batches, -(-args.iterations // args.batch)))
+    print(f'  Starting at seed {first_seed} with {args.jobs} jobs')
+
+    iterations = 0
+    failures = []
+    start = last_report = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            pending = set()
+            try:
+                while True:
+                    # Keep every worker busy without queueing up too much
+                    # work, so that we can stop soon after a failure
+                    while not failures and len(pending) < 2 * args.jobs:
+                        batch = next(batches, None)
+                        if batch is None:
+                            break
+                        pending.add(executor.submit(stresser.iteration, *batch))
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.cancelled():
+                            continue
+                        tested, failure = future.result()
+                        iterations += tested
+                        if failure is not None:
+                            failures.append(failure)
+                    if failures:
+                        # Only wait for the iterations that already started
+                        for future in pending:
+                            future.cancel()
+                    if time.monotonic() - last_report >= 1:
+                        report_progress(iterations, start)
+                        last_report = time.monotonic()
+            except StressError as err:
+                stresser.stopped.set()
+                for future in pending:
+                    future.cancel()
+                report_progress(iterations, start, final=True)
+                exit_error(str(err))
+            except KeyboardInterrupt:
+                stresser.stopped.set()
+                for future in pending:
+                    future.cancel()
+                report_progress(iterations, start, final=True)
+                sys.exit(130)
+    finally:
+        stresser.remove_work_dirs()
+    report_progress(iterations, start, final=True)
+
+    if not failures:
+        print('  No failing testcase found')
+        return
+
+    # Several workers might have failed at once, keep the smallest input
+    failure = min(failures, key=lambda f: (len(f.input), f.name))
+    path = save_failure(failure, solution_name, args.output_dir)
+    print(f'{failure.reason} on seed {failure.name}', file=sys.stderr)
+    if failure.judgemessage:
+        print(failure.judgemessage.rstrip(), file=sys.stderr)
+    print(f'Failing testcase saved to {path}', file=sys.stderr)
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
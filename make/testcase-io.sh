@@ -0,0 +1,120 @@
+#!/usr/bin/env bash
+# Helpers for reading testcases, to be sourced by the other scripts.
+# Testcases are either stored as plain `.in`/`.ans` files, or as zstd frames
+# (`.in.zst`/`.ans.zst`) when COMPRESS_TESTCASES is set (see compress-testcases.sh).
+# Compressed testcases are never written to disk uncompressed, but are streamed
+# to the programs reading them through pipes instead.
+
+# Usage: list_testcases testcases_dir
+# Prints the input file of every testcase, one per line
+list_testcases() {
+    find "$1" \
+         -maxdepth 1 \
+         -type f \
+         '(' -name '*.in' -or -name '*.in.zst' ')' \
+    | sort
+}
+
+# Usage: testcase_name in_file
+testcase_name() {
+    local NAME
+    NAME="$(basename "${1%.zst}")"
+    echo "${NAME%.in}"
+}
+
+# Usage: testcase_ans in_file
+# Prints the answer file belonging to the given input file
+testcase_ans() {
+    if [[ $1 == *.in.zst ]]; then
+        echo "${1%.in.zst}.ans.zst"
+    else
+        echo "${1%.in}.ans"
+    fi
+}
+
+# Usage: cat_testcase file
+cat_testcase() {
+    if [[ $1 == *.zst ]]; then
+        zstd -dcq -- "$1"
+    else
+        cat -- "$1"
+    fi
+}
+
+# Usage: check_decompression pid file
+# Waits for the zstd process decompressing file and fails if it did. zstd
+# getting killed by SIGPIPE (exit code 141) is fine, the reader simply did not
+# need the rest of the input.
+check_decompression() {
+    local RESULT
+    wait "$1"
+    RESULT="$?"
+    if [[ $RESULT -ne 0 ]] && [[ $RESULT -ne 141 ]]; then
+        echo "Decompressing $(basename "$2") failed" >&2
+        return 1
+    fi
+}
+
+# Usage: open_input in_file
+# Opens the input file for reading and stores the file descriptor in INPUT_FD.
+# Compressed files get decompressed into a pipe by a zstd process, whose pid
+# is stored in INPUT_PID (which is empty for plain files).
+open_input() {
+    if [[ $1 == *.zst ]]; then
+        exec {INPUT_FD}< <(zstd -dcq -- "$1")
+        INPUT_PID="$!"
+    else
+        exec {INPUT_FD}< "$1" || return 1
+        INPUT_PID=''
+    fi
+}
+
+# Usage: close_input in_file
+# Closes the file descriptor opened by open_input. Returns 1 if the
+# decompression failed.
+close_input() {
+    exec {INPUT_FD}<&-
+    if [[ -n $INPUT_PID ]]; then
+        check_decompression "$INPUT_PID" "$1" || return 1
+    fi
+}
+
+# Usage: run_with_input in_file command [args...]
+# Runs the command with the input file as stdin. Plain files are redirected
+# directly, compressed ones get decompressed into a pipe. Returns 1 if the
+# decompression failed, and the exit code of the command otherwise.
+run_with_input() {
+    local IN_FILE="$1"
+    shift
+    if [[ $IN_FILE == *.zst ]]; then
+        local RESULT
+        open_input "$IN_FILE"
+        "$@" <&"$INPUT_FD"
+        RESULT="$?"
+        close_input "$IN_FILE" || return 1
+        return "$RESULT"
+    else
+        "$@" < "$IN_FILE"
+    fi
+}
+
+# Usage: run_validator validator_executable in_file feedback_dir < output
+run_validator() {
+    local ANS_FILE
+    ANS_FILE="$(testcase_ans "$2")"
+    if [[ $2 == *.zst ]]; then
+        local IN_FD IN_PID ANS_FD ANS_PID RESULT
+        exec {IN_FD}< <(zstd -dcq -- "$2")
+        IN_PID="$!"
+        exec {ANS_FD}< <(zstd -dcq -- "$ANS_FILE")
+        ANS_PID="$!"
+        "$1" "/dev/fd/$IN_FD" "/dev/fd/$ANS_FD" "$3"
+        RESULT="$?"
+        exec {IN_FD}<&- {ANS_FD}<&-
+        check_decompression "$IN_PID" "$2" || return 1
+        check_decompression "$ANS_PID" "$ANS_FILE" || return 1
+        return "$RESULT"
+    else
+        "$1" "$2" "$ANS_FILE" "$3"
+    fi
+}
@@ -2,20 +2,59 @@
 
 TIMEFORMAT=%R
 
+source "$(dirname "${BASH_SOURCE[0]}")/testcase-io.sh"
+source "$(dirname "${BASH_SOURCE[0]}")/cpu-pinning.sh"
+
+# Timing runs sequentially, so with PIN_CPUS set only the first CPU is used
+setup_pinning || exit 1
+CPU="$(timing_cpu 1)"
+
+# The runtime of every testcase is also stored for `make profile-*`
+SOLUTION_NAME="$(basename "$(dirname "$1")")"
+TIMES_FILE="build/times/$SOLUTION_NAME"
+mkdir -p build/times
+rm -f "$TIMES_FILE"
+
+ERROR_FILE="$(mktemp)"
+trap 'rm -f "$ERROR_FILE"' EXIT
+
+# Usage: fail_timing message
+# Don't keep the times of a failed run, profile-% would rely on them
+fail_timing() {
+    if [[ ! -n $FULL ]]; then
+        echo ''
+    fi
+    echo "$1" >&2
+    rm -f "$TIMES_FILE"
+    exit 1
+}
+
 TIMES=''
-echo -n "Timing $(basename "$(dirname "$1")")"
+echo -n "Timing $SOLUTION_NAME"
 if [[ -n $FULL ]]; then
     echo ''
 fi
-for f in build/testcases/*.in; do
-    TIME="$( (time "$1" < "$f" > /dev/null) 2>&1)"
+while read -r f; do
+    if ! measure_run "$CPU" "$f" "$1" 2> "$ERROR_FILE"; then
+        fail_timing "$(cat "$ERROR_FILE")"
+    fi
+    if [[ $MEASURED_RESULT -ne 0 ]]; then
+        fail_timing "$SOLUTION_NAME failed on $(testcase_name "$f").in with exit code $MEASURED_RESULT"
+    fi
+    TIME="$MEASURED_TIME"
     if [[ -n $FULL ]]; then
         # TODO: find actual longest name instead of justifying to 30
-        printf '%-30s' "$(basename "$f"): "
-        echo "${TIME}s"
+        printf '%-30s' "$(testcase_name "$f").in: "
+        read -r _ FREQ RUNNABLE <<< "$MEASURED_STATE"
+        printf '%-10s(%s MHz, %s runnable)' "${TIME}s" "$FREQ" "$RUNNABLE"
+        if [[ $MEASURED_NOISY -eq 1 ]]; then
+            echo -n ' noisy'
+        fi
+        echo ''
     fi
+    echo "$(testcase_name "$f") $TIME" >> "$TIMES_FILE"
     TIMES="${TIMES} $TIME"
-done
+done < <(list_testcases build/testcases)
 MAXTIME="$(echo "$TIMES" | tr ' ' '\n' | sort -r | head -n1)"
 if [[ ! -n $FULL ]]; then
     echo -n ': '
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Append compressed testcases to a judge package.
+
+Every testcase listed in the manifest of the compressed store is decompressed
+by zstd and streamed into the archive as data/secret/<name>.{in,ans}, so no
+uncompressed copy of the testcases is ever written to disk.
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+
+
+def exit_error(message):
+    print(message, file=sys.stderr)
+    sys.exit(1)
+
+
+def read_manifest(testcases_dir):
+    with open(testcases_dir / 'manifest', 'r') as f:
+        return [line.split()[0] for line in f if line.strip()]
+
+
+def stream_into_zip(archive, compressed_path, name):
+    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with subprocess.Popen(['zstd', '-dcq', '--', str(compressed_path)],
+                          stdout=subprocess.PIPE) as zstd:
+        with archive.open(info, 'w', force_zip64=True) as entry:
+            shutil.copyfileobj(zstd.stdout, entry, CHUNK_SIZE)
+    if zstd.returncode != 0:
+        exit_error(f'Decompressing {compressed_path} failed')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('archive', help='the zip archive to append to')
+    parser.add_argument('testcases_dir', type=Path,
+                        help='the directory containing the compressed store')
+    args = parser.parse_args()
+
+    with zipfile.ZipFile(args.archive, 'a', zipfile.ZIP_DEFLATED) as archive:
+        for name in read_manifest(args.testcases_dir):
+            for ext in ('in', 'ans'):
+                stream_into_zip(archive, args.testcases_dir / f'{name}.{ext}.zst',
+                                f'data/secret/{name}.{ext}')
+
+
+if __name__ == '__main__':
+    main()